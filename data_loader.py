@@ -0,0 +1,149 @@
+import os
+import tempfile
+import numpy as np
+import streamlit as st
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+# Mapping pitch type abbreviations to full text
+pitch_type_mapping = {
+    "FF": "Four-Seam Fastball",
+    "SL": "Slider",
+    "CU": "Curveball",
+    "CH": "Changeup",
+    "FS": "Splitter",
+    "SI": "Sinker",
+    "FC": "Cutter",
+    "KC": "Knuckle Curve",
+    "KN": "Knuckleball",
+    "SV": "Sweeper",
+    "ST": "Sweeping Curve",
+    "CS": "Slow Curve",
+}
+
+# Version of the processed data layout; bump it whenever the columns, types, pitch type mapping or row order
+# change, so copies written by older code are ignored instead of reused
+cache_format_version = 3
+
+# Local uncompressed Arrow (Feather) copy of the processed data (sorted by pitcher) in the user's cache folder,
+# shared by both apps, reused across restarts and memory-mapped on read
+arrow_cache_path = Path.home() / ".cache" / "statcast" / f"statcast_2024_v{cache_format_version}.arrow"
+
+# Folder of this checkout, which already ships the monthly data files
+local_data_dir = Path(__file__).resolve().parent
+
+# Function to read one monthly file, from the local checkout when it is there and from GitHub otherwise
+def fetch_monthly_file(session, base_url, file_name):
+    local_path = local_data_dir / file_name
+    if local_path.exists():
+        return local_path.read_bytes()
+
+    # A stalled connection times out and is reported like any other failed month
+    response = session.get(f"{base_url}{file_name}", timeout=60)
+    response.raise_for_status()
+    return response.content
+
+# Function to load 2024 Statcast data (March to October), with the columns used by either app
+# (kept as one shared frame for every session and rerun instead of a fresh copy per call; callers never modify it)
+@st.cache_resource(show_spinner="Loading 2024 Statcast data...")
+def load_2024_data():
+    columns_to_keep = ['player_name', 'pitch_type', 'pfx_x', 'pfx_z', 'release_speed', 'p_throws']
+
+    # Skip the download and CSV parsing when a previous run already cached the data
+    if arrow_cache_path.exists():
+        try:
+            return feather.read_feather(arrow_cache_path, columns=columns_to_keep, memory_map=True)
+        except (pa.ArrowInvalid, OSError):
+            # A damaged cache file is dropped and rebuilt from the monthly files below
+            arrow_cache_path.unlink(missing_ok=True)
+
+    base_url = "https://raw.githubusercontent.com/cuatro-costuras/public-baseball/main/"
+    column_types = {
+        'player_name': pa.dictionary(pa.int32(), pa.string()),
+        'pitch_type': pa.dictionary(pa.int32(), pa.string()),
+        'pfx_x': pa.float32(),
+        'pfx_z': pa.float32(),
+        'release_speed': pa.float32(),
+        'p_throws': pa.dictionary(pa.int32(), pa.string()),
+    }
+    convert_options = pacsv.ConvertOptions(include_columns=columns_to_keep, column_types=column_types)
+
+    # Fetch all months concurrently and parse each file as soon as it arrives
+    tables = {}
+    file_names = [f'statcast_2024_{month:02d}.csv.gz' for month in range(3, 11)]  # March to October
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=len(file_names)) as executor:
+        # One pooled connection per worker, shared through a single session
+        session.mount("https://", HTTPAdapter(pool_maxsize=len(file_names)))
+        futures = {
+            executor.submit(fetch_monthly_file, session, base_url, file_name): file_name for file_name in file_names
+        }
+        for future in as_completed(futures):
+            file_name = futures[future]
+            try:
+                file_content = pa.CompressedInputStream(pa.BufferReader(future.result()), 'gzip')
+                tables[file_name] = pacsv.read_csv(file_content, convert_options=convert_options)  # Keep only necessary columns
+            except requests.exceptions.HTTPError as http_err:
+                st.warning(f"HTTP Error for file: {file_name} - {http_err}")
+            except Exception as e:
+                st.error(f"Error loading file {file_name}: {e}")
+
+    # Combine the months in calendar order; their category sets are unified on conversion
+    if tables:
+        combined_table = pa.concat_tables([tables[file_name] for file_name in file_names if file_name in tables])
+    else:
+        combined_table = pa.schema([(column, column_types[column]) for column in columns_to_keep]).empty_table()
+    combined_data = combined_table.to_pandas()
+
+    # Drop unknown pitch types, then map the rest to full text by renaming the (few) categories
+    known_pitch_types = combined_data["pitch_type"].isin(pitch_type_mapping)
+    combined_data = combined_data[known_pitch_types].assign(
+        pitch_type=lambda df: df["pitch_type"].cat.remove_unused_categories().cat.rename_categories(pitch_type_mapping)
+    )
+
+    # Convert horizontal and vertical movement from feet to inches (stays float32)
+    combined_data[["pfx_x", "pfx_z"]] *= 12
+
+    # Group each pitcher's pitches together (keeping them in date order) so a pitcher is one contiguous slice
+    combined_data = combined_data.sort_values("player_name", kind="stable", ignore_index=True)
+
+    # Cache the processed data locally once every month has loaded
+    if len(tables) == len(file_names):
+        temp_path = None
+        try:
+            arrow_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file and move it into place, so a crash or both apps starting at once
+            # never leave a partial cache file behind
+            with tempfile.NamedTemporaryFile(dir=arrow_cache_path.parent, suffix=".tmp", delete=False) as temp_file:
+                temp_path = Path(temp_file.name)
+                feather.write_feather(
+                    pa.Table.from_pandas(combined_data, preserve_index=False), temp_file, compression="uncompressed"
+                )
+            os.replace(temp_path, arrow_cache_path)
+        except OSError as e:
+            if temp_path is not None:
+                temp_path.unlink(missing_ok=True)
+            st.warning(f"Could not write local cache {arrow_cache_path.name}: {e}")
+
+    return combined_data
+
+# Function to list the pitchers for the selection dropdown, built once for the shared data
+# (takes no arguments, so a rerun is a plain cache lookup instead of hashing the whole frame)
+@st.cache_resource(show_spinner=False)
+def get_pitcher_list():
+    return sorted(load_2024_data()["player_name"].dropna().unique().tolist())
+
+# Function to map each pitcher to their slice of the (pitcher-sorted) rows, built once for the shared data
+# (takes no arguments, so a selection is a dict lookup instead of hashing the whole frame)
+@st.cache_resource(show_spinner=False)
+def build_pitcher_index():
+    data = load_2024_data()
+    codes = data["player_name"].cat.codes.to_numpy()
+    starts = np.flatnonzero(np.diff(codes, prepend=-2))
+    stops = np.append(starts[1:], len(codes))
+    names = data["player_name"].iloc[starts]
+    return {name: slice(start, stop) for name, start, stop in zip(names, starts, stops)}
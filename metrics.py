@@ -0,0 +1,7 @@
+import numpy as np
+
+# Function to score every pitcher's pitch types, for the apps' cached consistency tables
+# (consistency score = square root of the summed variances of the given columns; lower is more repeatable)
+def compute_consistency(data, columns):
+    variances = data.groupby(["player_name", "pitch_type"], observed=True, sort=False)[columns].var()
+    return np.sqrt(variances.sum(axis=1, skipna=False)).reset_index(name="Consistency Score")
@@ -2,59 +2,54 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 import altair as alt
-import requests
-from io import BytesIO
-
-# Mapping pitch type abbreviations to full text
-pitch_type_mapping = {
-    "FF": "Four-Seam Fastball",
-    "SL": "Slider",
-    "CU": "Curveball",
-    "CH": "Changeup",
-    "FS": "Splitter",
-    "SI": "Sinker",
-    "FC": "Cutter",
-    "KC": "Knuckle Curve",
-    "KN": "Knuckleball",
-    "SV": "Sweeper",
-    "ST": "Sweeping Curve",
-    "CS": "Slow Curve",
-}
+from data_loader import load_2024_data, get_pitcher_list, build_pitcher_index
+from metrics import compute_consistency
 
 # List of pitch types categorized for polarity adjustment
 fastballs = ["Four-Seam Fastball", "Sinker", "Cutter", "Splitter", "Changeup"]
 breaking_balls = ["Slider", "Curveball", "Knuckle Curve", "Sweeper", "Sweeping Curve", "Slow Curve"]
 
-# Function to load 2024 Statcast data from GitHub (March to October)
+# Function to score every pitcher's pitch types on movement and velocity, with percentiles, computed once for all selections
+# (takes no arguments, so a selection is a plain cache lookup instead of hashing the whole frame)
+@st.cache_resource(show_spinner=False)
+def compute_consistency_percentiles():
+    all_pitchers_consistency = compute_consistency(load_2024_data(), ["pfx_x", "pfx_z", "release_speed"])
+
+    # Percentile for each pitch type: share of all its pitchers whose score is at least as high
+    # (pitchers without a score count toward the total and get 0)
+    by_pitch_type = all_pitchers_consistency.groupby("pitch_type", observed=True, sort=False)["Consistency Score"]
+    all_pitchers_consistency["Percentile"] = (
+        by_pitch_type.rank(ascending=False, method="max") / by_pitch_type.transform("size") * 100
+    ).fillna(0)
+    return all_pitchers_consistency
+
+# Function to estimate each pitch type's density curve for the violin plots
+# (Gaussian KDE using the same Scott's rule bandwidth as Vega's density transform; unlike Vega's default
+# per-pitch-type extent and adaptive step count, every curve is sampled on one shared grid)
 @st.cache_data
-def load_2024_data():
-    base_url = "https://raw.githubusercontent.com/cuatro-costuras/public-baseball/main/"
-    combined_data = pd.DataFrame()
-    columns_to_keep = ['player_name', 'pitch_type', 'pfx_x', 'pfx_z', 'release_speed', 'p_throws']
-
-    for month in range(3, 11):  # March to October
-        file_name = f'statcast_2024_{month:02d}.csv.gz'
-        file_url = f"{base_url}{file_name}"
-        try:
-            response = requests.get(file_url)
-            response.raise_for_status()
-            file_content = BytesIO(response.content)
-            data = pd.read_csv(file_content, compression='gzip', usecols=columns_to_keep)
-            combined_data = pd.concat([combined_data, data], ignore_index=True)
-        except requests.exceptions.HTTPError as http_err:
-            st.warning(f"HTTP Error for file: {file_name} - {http_err}")
-        except Exception as e:
-            st.error(f"Error loading file {file_name}: {e}")
-
-    # Map pitch types to full text
-    combined_data["pitch_type"] = combined_data["pitch_type"].map(pitch_type_mapping).fillna("Unknown")
-    combined_data = combined_data[combined_data["pitch_type"] != "Unknown"]  # Remove unknown pitch types
-
-    # Convert movement profiles from feet to inches
-    combined_data["pfx_x"] = combined_data["pfx_x"] * 12  # Horizontal movement in inches
-    combined_data["pfx_z"] = combined_data["pfx_z"] * 12  # Vertical movement in inches
-
-    return combined_data
+def compute_density(data, field, steps=200):
+    # All curves share one grid over the field's full extent so the areas stack cleanly,
+    # which gives each curve (near-zero) tails across the whole range
+    grid = np.linspace(data[field].min(), data[field].max(), steps)
+
+    densities = []
+    for pitch_type, values in data.groupby("pitch_type", observed=True, sort=False)[field]:
+        values = values.dropna().to_numpy(dtype=np.float64)
+        if values.size == 0:
+            continue
+
+        q1, q3 = np.percentile(values, [25, 75])
+        std = values.std(ddof=1) if values.size > 1 else 0.0
+        spread = min(std, (q3 - q1) / 1.34) or std or abs(q1) or 1.0
+        bandwidth = 1.06 * spread * values.size ** -0.2
+
+        kernel = np.exp(-0.5 * ((grid[:, None] - values[None, :]) / bandwidth) ** 2)
+        density = kernel.sum(axis=1) / (values.size * bandwidth * np.sqrt(2 * np.pi))
+        densities.append(pd.DataFrame({"pitch_type": pitch_type, "value": grid, "density": density}))
+
+    if not densities:
+        return pd.DataFrame(columns=["pitch_type", "value", "density"])
+    return pd.concat(densities, ignore_index=True)
 
 # Load the data
 data = load_2024_data()
@@ -64,37 +59,38 @@ if not data.empty:
     st.title("MLB Movement Profile Distributions App")
 
     # Combine search bar and dropdown for pitcher selection
-    all_pitchers = sorted(data["player_name"].dropna().unique())
+    all_pitchers = get_pitcher_list()
     pitcher_name = st.selectbox(
         "Search or select a pitcher:",
         options=["Type a name or select..."] + all_pitchers
     )
 
     if pitcher_name and pitcher_name != "Type a name or select...":
-        pitcher_data = data[data["player_name"] == pitcher_name]
+        pitcher_data = data.iloc[build_pitcher_index()[pitcher_name]]
         pitcher_hand = pitcher_data["p_throws"].iloc[0]  # Get the handedness of the pitcher
 
         # Display pitcher handedness beneath their name
         st.write(f"**Handedness**: {'Right-Handed (R)' if pitcher_hand == 'R' else 'Left-Handed (L)'}")
 
         # Adjust horizontal break (`pfx_x`) based on pitch type and handedness
-        adjusted_pitcher_data = pitcher_data.copy()
-        if pitcher_hand == "R":
-            adjusted_pitcher_data.loc[adjusted_pitcher_data["pitch_type"].isin(fastballs), "pfx_x"] = np.abs(adjusted_pitcher_data["pfx_x"])
-            adjusted_pitcher_data.loc[adjusted_pitcher_data["pitch_type"].isin(breaking_balls), "pfx_x"] = -np.abs(adjusted_pitcher_data["pfx_x"])
-        elif pitcher_hand == "L":
-            adjusted_pitcher_data.loc[adjusted_pitcher_data["pitch_type"].isin(fastballs), "pfx_x"] = -np.abs(adjusted_pitcher_data["pfx_x"])
-            adjusted_pitcher_data.loc[adjusted_pitcher_data["pitch_type"].isin(breaking_balls), "pfx_x"] = np.abs(adjusted_pitcher_data["pfx_x"])
+        # Fastballs break toward the arm side and breaking balls toward the glove side;
+        # other pitch types keep their original sign
+        adjusted_pitcher_data = pitcher_data
+        if pitcher_hand in ("R", "L"):
+            arm_side = 1.0 if pitcher_hand == "R" else -1.0
+            pfx_x = pitcher_data["pfx_x"].to_numpy()
+            is_fastball = pitcher_data["pitch_type"].isin(fastballs).to_numpy()
+            is_breaking_ball = pitcher_data["pitch_type"].isin(breaking_balls).to_numpy()
+            adjusted_pitcher_data = pitcher_data.assign(pfx_x=np.where(
+                is_fastball, arm_side * np.abs(pfx_x),
+                np.where(is_breaking_ball, -arm_side * np.abs(pfx_x), pfx_x)
+            ))
 
         st.write(f"### Movement Profiles for {pitcher_name}")
 
         # Create and display violin charts with legends on the right
         def create_violin_chart(data, field, title, y_label):
-            base = alt.Chart(data).transform_density(
-                density=field,
-                groupby=["pitch_type"],
-                as_=["value", "density"]
-            )
+            base = alt.Chart(compute_density(data, field))
 
             density = base.mark_area(opacity=0.6).encode(
                 x=alt.X("value:Q", title=y_label),
@@ -124,28 +120,13 @@ if not data.empty:
         st.altair_chart(velocity_violin, use_container_width=True)
 
         # Consistency Score Table
-        all_pitchers_consistency = (
-            data.groupby(["player_name", "pitch_type"])
-            .apply(lambda x: np.sqrt(
-                x["pfx_x"].std()**2 +
-                x["pfx_z"].std()**2 +
-                x["release_speed"].std()**2
-            ))
-            .reset_index(name="Consistency Score")
-        )
-
-        # Percentile for each pitch type
-        def calculate_percentile(row):
-            same_pitch_type = all_pitchers_consistency[all_pitchers_consistency["pitch_type"] == row["pitch_type"]]
-            return (row["Consistency Score"] <= same_pitch_type["Consistency Score"]).mean() * 100
-
-        all_pitchers_consistency["Percentile"] = all_pitchers_consistency.apply(calculate_percentile, axis=1)
-        all_pitchers_consistency["Consistency Score"] = all_pitchers_consistency["Consistency Score"].map("{:.2f}".format)
-        all_pitchers_consistency["Percentile"] = all_pitchers_consistency["Percentile"].map("{:.1f}".format)
+        all_pitchers_consistency = compute_consistency_percentiles()
 
         # Filter for the selected pitcher
         pitcher_consistency = all_pitchers_consistency[all_pitchers_consistency["player_name"] == pitcher_name]
         pitcher_consistency = pitcher_consistency.sort_values(by="Consistency Score").reset_index(drop=True)
+        pitcher_consistency["Consistency Score"] = pitcher_consistency["Consistency Score"].map("{:.2f}".format)
+        pitcher_consistency["Percentile"] = pitcher_consistency["Percentile"].map("{:.1f}".format)
 
         # Display table below the violin plots
         st.write("### Pitch Consistency Rankings")